@@ -1,90 +1,350 @@
 import os
 import re
-import json
-import statistics
-from typing import List, Dict, Any, Optional
+import asyncio
+import hashlib
+import threading
+import time
+from functools import lru_cache
+from typing import List, Dict, Any, Optional, Sequence, Tuple
 from urllib.parse import urlparse, quote_plus
 
+import numpy as np
+import orjson
 import requests
+from cachetools import TTLCache
+from datasketch import MinHash, MinHashLSH
 from dotenv import load_dotenv
-from textblob import TextBlob
-import Levenshtein
+from vaderSentiment.vaderSentiment import SentimentIntensityAnalyzer
+from rapidfuzz import process, distance
+
+load_dotenv()
 
 # DistilBERT sentiment (Hugging Face transformers)
-try:
-    from transformers import pipeline
+HF_MODEL_NAME = "distilbert-base-uncased-finetuned-sst-2-english"
+HF_BATCH_SIZE = 32
+HF_MAX_LENGTH = 256
+# Character-length bucket edges (~32/64/128/256 tokens); batches never mix buckets
+HF_LENGTH_BUCKETS = [120, 250, 500, 1000]
+# Exported + int8-quantized ONNX model is cached here after the first run
+HF_ONNX_DIR = os.getenv(
+    "TRUTHLENS_ONNX_DIR",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), ".onnx_cache"),
+)
 
-    hf_sentiment = pipeline(
-        "sentiment-analysis",
-        model="distilbert-base-uncased-finetuned-sst-2-english",
-    )
-except Exception:
-    hf_sentiment = None
+
+def _softmax(logits: np.ndarray) -> np.ndarray:
+    shifted = np.exp(logits - logits.max(axis=-1, keepdims=True))
+    return shifted / shifted.sum(axis=-1, keepdims=True)
+
+
+def _load_onnx_session():
+    """
+    Exports DistilBERT to ONNX and applies dynamic int8 quantization (once,
+    cached in HF_ONNX_DIR), then opens an ONNX Runtime CPU session on it.
+    """
+    import onnxruntime as ort
+
+    quantized_path = os.path.join(HF_ONNX_DIR, "model_quantized.onnx")
+    if not os.path.exists(quantized_path):
+        from optimum.onnxruntime import ORTModelForSequenceClassification, ORTQuantizer
+        from optimum.onnxruntime.configuration import AutoQuantizationConfig
+
+        ort_model = ORTModelForSequenceClassification.from_pretrained(HF_MODEL_NAME, export=True)
+        quantizer = ORTQuantizer.from_pretrained(ort_model)
+        quantizer.quantize(
+            save_dir=HF_ONNX_DIR,
+            quantization_config=AutoQuantizationConfig.avx512_vnni(is_static=False, per_channel=False),
+        )
+
+    sess_options = ort.SessionOptions()
+    sess_options.intra_op_num_threads = os.cpu_count() or 1
+    return ort.InferenceSession(quantized_path, sess_options, providers=["CPUExecutionProvider"])
+
+
+def _load_hf_sentiment():
+    """
+    Returns a function mapping a batch of texts to P(positive) as a NumPy array.
+    On a CUDA machine this is the FP16 PyTorch model on the GPU. On CPU it
+    prefers the int8 ONNX Runtime session and falls back to the FP32 PyTorch
+    model when onnxruntime / optimum are not installed.
+    """
+    import torch
+    from transformers import AutoConfig, AutoTokenizer
+
+    tokenizer = AutoTokenizer.from_pretrained(HF_MODEL_NAME)
+    positive_idx = AutoConfig.from_pretrained(HF_MODEL_NAME).label2id.get("POSITIVE", 1)
+    use_cuda = torch.cuda.is_available()
+
+    session = None
+    if not use_cuda:
+        try:
+            session = _load_onnx_session()
+        except Exception as e:
+            print(f"ONNX Runtime unavailable, using PyTorch: {e}")
+
+    if session is not None:
+        input_names = {i.name for i in session.get_inputs()}
+
+        def positive_prob(batch: List[str]) -> np.ndarray:
+            encoded = tokenizer(
+                batch,
+                padding="longest",
+                truncation=True,
+                max_length=HF_MAX_LENGTH,
+                return_tensors="np",
+            )
+            feed = {k: v.astype(np.int64) for k, v in encoded.items() if k in input_names}
+            logits = session.run(None, feed)[0]
+            return _softmax(logits)[:, positive_idx]
+
+        return positive_prob
+
+    from transformers import AutoModelForSequenceClassification
+
+    # Use all but one core for intra-op math; inter-op parallelism buys nothing here
+    torch.set_num_threads(max(1, (os.cpu_count() or 1) - 1))
+    try:
+        torch.set_num_interop_threads(1)
+    except RuntimeError:
+        # Can only be set once, before any inter-op parallel work has started
+        pass
+
+    device = torch.device("cuda" if use_cuda else "cpu")
+    model = AutoModelForSequenceClassification.from_pretrained(
+        HF_MODEL_NAME,
+        torch_dtype=torch.float16 if use_cuda else torch.float32,
+    ).to(device)
+    model.eval()
+    if os.getenv("TRUTHLENS_TORCH_COMPILE") == "1" and hasattr(torch, "compile"):
+        model = torch.compile(model, dynamic=True)
+
+    def positive_prob(batch: List[str]) -> np.ndarray:
+        encoded = tokenizer(
+            batch,
+            padding="longest",
+            truncation=True,
+            max_length=HF_MAX_LENGTH,
+            return_tensors="pt",
+        ).to(device)
+        with torch.inference_mode():
+            logits = model(**encoded).logits.float()
+        return torch.softmax(logits, dim=-1)[:, positive_idx].cpu().numpy()
+
+    return positive_prob
+
+
+_sentiment_lock = threading.Lock()
+
+
+@lru_cache(maxsize=1)
+def _build_sentiment():
+    if os.getenv("TRUTHLENS_DISABLE_HF") == "1":
+        return None
+    try:
+        return _load_hf_sentiment()
+    except Exception as e:
+        # Cache the failure too: fall back to VADER instead of reloading per request
+        print(f"Sentiment Model Load Error: {e}")
+        return None
+
+
+def _get_sentiment():
+    """
+    Loads the sentiment model on first use and keeps it resident for the
+    process lifetime, so importing this module (and FastAPI startup) stays fast.
+    Returns None when disabled via TRUTHLENS_DISABLE_HF=1 (e.g. in CI) or when
+    loading failed. The lock keeps concurrent first requests from loading (and
+    exporting the ONNX model) twice.
+    """
+    with _sentiment_lock:
+        return _build_sentiment()
 
 # Try to import Gemini; handle failure gracefully if not installed
 try:
     import google.generativeai as genai
+    from google.api_core.exceptions import GoogleAPIError
+
+    # Transport / quota failures that trigger the cooldown (not per-response errors)
+    _GEMINI_OUTAGE_ERRORS = (asyncio.TimeoutError, GoogleAPIError)
 except ImportError:
     genai = None
+    _GEMINI_OUTAGE_ERRORS = (asyncio.TimeoutError,)
 
-load_dotenv()
 GEMINI_API_KEY = os.getenv("GEMINI_API_KEY")
+# Use a fast, cost-effective Gemini model
+GEMINI_MODEL_NAME = "models/gemini-2.5-flash"
+# Hard cap on the Gemini call; on timeout we fall back to statistical mode
+GEMINI_TIMEOUT_S = float(os.getenv("GEMINI_TIMEOUT_S", "6.0"))
+# After a Gemini timeout / API outage, skip it for this long instead of waiting on it again
+GEMINI_COOLDOWN_S = float(os.getenv("GEMINI_COOLDOWN_S", "30.0"))
+_gemini_retry_at = 0.0
+
+_gemini_lock = threading.Lock()
+
+# Gemini pros/cons/verdict keyed by SHA-256 of the prompt reviews, so re-scraped
+# product pages skip the network round-trip.
+_gemini_cache: TTLCache = TTLCache(maxsize=2048, ttl=3600)
+_gemini_cache_lock = threading.Lock()
+
+# Structured output: Gemini returns bare JSON matching this schema (no markdown fences)
+_STRING_LIST_SCHEMA = {"type": "ARRAY", "items": {"type": "STRING"}}
+GEMINI_GENERATION_CONFIG = {
+    "response_mime_type": "application/json",
+    "response_schema": {
+        "type": "OBJECT",
+        "properties": {
+            "pros": _STRING_LIST_SCHEMA,
+            "cons": _STRING_LIST_SCHEMA,
+            "verdict": {"type": "STRING"},
+        },
+        "required": ["pros", "cons", "verdict"],
+    },
+}
+
+
+@lru_cache(maxsize=1)
+def _build_gemini_model():
+    genai.configure(api_key=GEMINI_API_KEY)
+    return genai.GenerativeModel(GEMINI_MODEL_NAME)
+
+
+def gemini_enabled() -> bool:
+    """True when the Gemini SDK is installed and an API key is configured."""
+    return bool(genai and GEMINI_API_KEY)
+
+
+def _gemini_model():
+    """
+    Configures the Gemini client once and reuses the model for every request.
+    The lock keeps concurrent first requests (FastAPI threadpool) from
+    initializing it twice.
+    """
+    with _gemini_lock:
+        return _build_gemini_model()
 
 # Domain whitelist for phishing detection
-WHITELIST_DOMAINS = [
+WHITELIST_DOMAINS = frozenset({
     "amazon.com",
     "flipkart.com",
     "ebay.com",
     "walmart.com",
     "amazon.in",
     "meesho.com",
-]
-
-def clean_json_string(text: str) -> str:
-    """
-    Cleans the raw response from Gemini to ensure it can be parsed as JSON.
-    Removes markdown code blocks (```json ... ```).
-    """
-    # Remove code block markers
-    text = re.sub(r"```[a-zA-Z]*\n", "", text) # Remove ```json or ```
-    text = re.sub(r"```", "", text) # Remove closing ```
-    
-    # Strip whitespace
-    text = text.strip()
-    
-    return text
+})
+# Stable ordering for the fuzzy typosquat match
+WHITELIST_TUPLE = tuple(sorted(WHITELIST_DOMAINS))
+# Brand labels of whitelisted domains ("amazon", "ebay", ...); regional variants
+# such as amazon.de or ebay.ca are legitimate, not typosquats.
+WHITELIST_BRANDS = frozenset(d.split(".")[0] for d in WHITELIST_DOMAINS)
+# Real marketplaces that happen to sit within edit distance 2 of the whitelist
+KNOWN_MARKETPLACES = frozenset({
+    "etsy.com",
+})
+
+# Common Rupee notations, e.g. '₹2,999' or 'Rs. 1,499'
+_PRICE_RE = re.compile(r"(?:₹|rs\.?\s*)([\d,]{3,9})", flags=re.IGNORECASE)
 
 def check_phishing(url: str) -> str:
     """
     Checks if the URL is a known safe domain, a potential typosquatting attempt, or unknown.
     """
+    return _check_phishing_cached(url)
+
+
+def _split_domain(url: str) -> Tuple[str, str]:
+    """Returns (full host, base domain) for a URL, e.g. ("www.amazon.in", "amazon.in")."""
+    parsed = urlparse(url)
+    domain = parsed.netloc.lower()
+    # Remove port if present
+    if ":" in domain:
+        domain = domain.split(":")[0]
+
+    # Handle "www." and subdomains to get the base domain (e.g., "amazon.in")
+    parts = domain.split(".")
+    if len(parts) >= 2:
+        base_domain = ".".join(parts[-2:])
+    else:
+        base_domain = domain
+    return domain, base_domain
+
+
+@lru_cache(maxsize=4096)
+def _check_phishing_cached(url: str) -> str:
+    # Pure function of the URL (the whitelist is static), so results are memoized
     try:
-        parsed = urlparse(url)
-        domain = parsed.netloc.lower()
-        # Remove port if present
-        if ":" in domain:
-            domain = domain.split(":")[0]
-            
-        # Handle "www." and subdomains to get the base domain (e.g., "amazon.in")
-        parts = domain.split(".")
-        if len(parts) >= 2:
-            base_domain = ".".join(parts[-2:])
-        else:
-            base_domain = domain
-            
+        domain, base_domain = _split_domain(url)
+
         if base_domain in WHITELIST_DOMAINS or domain in WHITELIST_DOMAINS:
             return "Safe"
             
-        for safe in WHITELIST_DOMAINS:
-            # If the domain is very close (1-2 chars different) to a safe one, flag it.
-            if Levenshtein.distance(base_domain, safe) <= 2:
-                return "Phishing Warning"
-        
+        # If the domain is very close (1-2 chars different) to a safe one, flag it.
+        hit = process.extractOne(
+            base_domain,
+            WHITELIST_TUPLE,
+            scorer=distance.Levenshtein.distance,
+            score_cutoff=2,
+        )
+        if hit:
+            return "Phishing Warning"
+
         return "Suspicious" # Default for unknown/unverified domains
     except:
         return "Unknown"
 
 
+@lru_cache(maxsize=4096)
+def is_confirmed_typosquat(url: str) -> bool:
+    """
+    Stricter than check_phishing's "Phishing Warning" (distance <= 2), which also
+    flags real sites like amazon.de or etsy.com. Only True when the base domain
+    is one edit away from a whitelisted domain with the same TLD (e.g. amaz0n.in)
+    and is neither a whitelisted brand on another TLD nor a known marketplace.
+    """
+    try:
+        domain, base_domain = _split_domain(url)
+        if base_domain in WHITELIST_DOMAINS or base_domain in KNOWN_MARKETPLACES:
+            return False
+
+        brand, _, tld = base_domain.partition(".")
+        if brand in WHITELIST_BRANDS:
+            return False
+
+        return any(
+            safe.partition(".")[2] == tld
+            and distance.Levenshtein.distance(base_domain, safe, score_cutoff=1) <= 1
+            for safe in WHITELIST_TUPLE
+        )
+    except Exception:
+        return False
+
+
+def _hf_polarities(positive_prob, texts: List[str]) -> List[float]:
+    """
+    Runs DistilBERT over the texts in length-bucketed, length-sorted
+    mini-batches, so each batch is only padded to its own longest review
+    instead of the longest overall.
+    Each distinct non-empty text is scored once; blank reviews stay neutral.
+    Returns polarities in [-1, 1], in the original order.
+    """
+    unique = [t for t in dict.fromkeys(texts) if t.strip()]
+    char_len = np.fromiter((len(t) for t in unique), dtype=np.int64, count=len(unique))
+    buckets = np.digitize(char_len, HF_LENGTH_BUCKETS)
+    unique_polarities = np.zeros(len(unique), dtype=np.float64)
+
+    for bucket in np.unique(buckets):
+        bucket_idx = np.flatnonzero(buckets == bucket)
+        bucket_idx = bucket_idx[np.argsort(char_len[bucket_idx], kind="stable")]
+
+        for start in range(0, len(bucket_idx), HF_BATCH_SIZE):
+            batch_idx = bucket_idx[start:start + HF_BATCH_SIZE]
+            p_positive = positive_prob([unique[i] for i in batch_idx])
+            # Map P(positive) 0..1 -> polarity -1..1, scattered back to input order
+            unique_polarities[batch_idx] = (2 * p_positive) - 1
+
+    polarity_of = dict(zip(unique, unique_polarities.tolist()))
+    return [polarity_of.get(t, 0.0) for t in texts]
+
+
 def _extract_price_rupees(text: str) -> Optional[float]:
     """
     Extracts a price in rupees from arbitrary text like '₹2,999' or 'Rs. 1,499'.
@@ -92,8 +352,7 @@ def _extract_price_rupees(text: str) -> Optional[float]:
     """
     if not text:
         return None
-    # Common Rupee notations
-    match = re.search(r"(?:₹|rs\.?\s*)([\d,]{3,9})", text, flags=re.IGNORECASE)
+    match = _PRICE_RE.search(text)
     if not match:
         return None
     try:
@@ -250,116 +509,241 @@ def analyze_site_risk(domain_status: str, page_text: str, title: str = "") -> Di
         "reference_price": price_info.get("reference_price"),
     }
 
-def analyze_reviews(reviews_data: List[Dict[str, Any]]) -> Dict[str, Any]:
+_WORD_RE = re.compile(r"\w+")
+MINHASH_NUM_PERM = 64
+NEAR_DUPLICATE_THRESHOLD = 0.8
+# Permutation parameters are generated once here and shared by every .copy(),
+# instead of being regenerated for each review (the bulk of MinHash setup cost).
+_MINHASH_TEMPLATE = MinHash(num_perm=MINHASH_NUM_PERM)
+
+
+def _minhash(text: str) -> MinHash:
     """
-    Analyzes a list of structured review objects:
-    [{ 'text': '...', 'rating': 5, 'date': '...', 'verified': True }, ...]
+    MinHash over lowercase word 3-shingles. Punctuation, emoji and whitespace
+    are ignored, so lightly edited copies still hash close together.
     """
-    
-    # 1. EXTRACT DATA VECTORS
-    texts = [r.get('text', '') for r in reviews_data]
-    ratings = [r.get('rating', 0) for r in reviews_data]
-    
-    # Safety check for empty reviews
-    if not texts:
-        return {
-            "trust_score": 0, 
-            "sentiment_score": 0.0,
-            "bot_probability": 0,
-            "safety_label": "Unknown",
-            "pros": [], 
-            "cons": [], 
-            "verdict": "No reviews found to analyze."
-        }
+    tokens = _WORD_RE.findall(text.lower())
+    if len(tokens) >= 3:
+        shingles = {" ".join(tokens[i:i + 3]) for i in range(len(tokens) - 2)}
+    else:
+        shingles = {" ".join(tokens)}
+    m = _MINHASH_TEMPLATE.copy()
+    m.update_batch([sh.encode("utf-8") for sh in shingles])
+    return m
+
+
+def _near_duplicate_count(texts: List[str]) -> int:
+    """
+    Counts reviews that are near-duplicates (estimated Jaccard >= 0.8) of an
+    earlier review, i.e. templated / copy-paste reviews with small edits.
+    """
+    lsh = MinHashLSH(threshold=NEAR_DUPLICATE_THRESHOLD, num_perm=MINHASH_NUM_PERM)
+    duplicates = 0
+    for i, text in enumerate(texts):
+        m = _minhash(text)
+        if lsh.query(m):
+            duplicates += 1
+        lsh.insert(str(i), m)
+    return duplicates
 
-    # 2. SENTIMENT ANALYSIS
-    # Prefer DistilBERT (Hugging Face) when available, fall back to TextBlob.
+
+# Lexicon-based fallback sentiment; one shared, thread-safe analyzer
+_vader = SentimentIntensityAnalyzer()
+
+
+@lru_cache(maxsize=4096)
+def _polarity(text: str) -> float:
+    """VADER compound score in [-1, 1], cached for repeated review strings."""
+    return _vader.polarity_scores(text)["compound"]
+
+
+def select_prompt_reviews(texts: List[str], k: int = 15) -> List[int]:
+    """
+    Picks up to k diverse review indices for the Gemini prompt instead of the
+    first k: the 3 most positive, the 3 most negative, and the rest around the
+    median sentiment, skipping blanks and near-duplicates of already-picked ones.
+    Uses the cheap VADER polarity so Gemini can still start before DistilBERT.
+    """
+    if not texts:
+        return []
+
+    polarity = np.fromiter((_polarity(t) for t in texts), dtype=np.float64, count=len(texts))
+    order = np.argsort(polarity, kind="stable")
+    median_pos = len(order) // 2
+    around_median = sorted(range(len(order)), key=lambda pos: abs(pos - median_pos))
+    candidates = [*order[::-1][:3], *order[:3], *(order[pos] for pos in around_median)]
+
+    lsh = MinHashLSH(threshold=NEAR_DUPLICATE_THRESHOLD, num_perm=MINHASH_NUM_PERM)
+    picked: List[int] = []
+    for i in dict.fromkeys(int(c) for c in candidates):
+        if len(picked) >= k:
+            break
+        if not texts[i].strip():
+            continue
+        m = _minhash(texts[i])
+        if lsh.query(m):
+            continue
+        lsh.insert(str(i), m)
+        picked.append(i)
+
+    return sorted(picked)
+
+
+def _run_sentiment(texts: List[str]) -> List[float]:
+    """
+    Sentiment polarity in [-1, 1] for each review text.
+    Prefers DistilBERT (Hugging Face) when available, falls back to VADER.
+    """
     polarities: List[float] = []
 
-    if hf_sentiment is not None and texts:
+    hf_sentiment = _get_sentiment()
+    if hf_sentiment is not None:
         try:
-            results = hf_sentiment(texts, truncation=True, max_length=256)
-            for res in results:
-                label = (res.get("label") or "").upper()
-                score = float(res.get("score", 0.5))
-                # Map POSITIVE/NEGATIVE into [-1, 1]
-                if "POSITIVE" in label:
-                    polarity = (2 * score) - 1  # 0..1 -> -1..1
-                else:
-                    polarity = 1 - (2 * score)
-                polarities.append(polarity)
+            polarities = _hf_polarities(hf_sentiment, texts)
         except Exception:
             polarities = []
 
     if not polarities:
-        for text in texts:
-            try:
-                blob = TextBlob(text)
-                polarities.append(blob.sentiment.polarity)
-            except Exception:
-                polarities.append(0.0)
+        polarities = [_polarity(t) for t in texts]
 
-    avg_sentiment = statistics.mean(polarities) if polarities else 0.0
-    avg_rating = statistics.mean(ratings) if ratings else 0.0
+    return polarities
 
-    # 3. SENTIMENT REALITY CHECK
-    # Check if high stars (5.0) match high sentiment (>0.5).
-    # Normalized rating: 0-5 stars -> -1.0 to 1.0 range
-    normalized_rating = (avg_rating - 2.5) / 2.5 
-    discrepancy = abs(normalized_rating - avg_sentiment)
 
-    # 4. GEMINI ANALYSIS (for pros/cons + verdict only)
+async def _call_gemini(prompt: str) -> Dict[str, Any]:
+    model = _gemini_model()
+    response = await model.generate_content_async(prompt, generation_config=GEMINI_GENERATION_CONFIG)
+    return orjson.loads(response.text) if response.text else {}
+
+
+def _review_as_dict(review: Any) -> Dict[str, Any]:
+    """Plain dict for a review given as a dict or a Pydantic (v1 / v2) model."""
+    if isinstance(review, dict):
+        return review
+    if hasattr(review, "model_dump"):
+        return review.model_dump()
+    return review.dict()
+
+
+def _prompt_reviews(texts: List[str], reviews: Sequence[Any]) -> List[Dict[str, Any]]:
+    return [_review_as_dict(reviews[i]) for i in select_prompt_reviews(texts)]
+
+
+async def _run_gemini(texts: List[str], reviews: Sequence[Any]) -> Dict[str, Any]:
+    """
+    Asks Gemini for pros / cons / a one-sentence verdict (never the score),
+    based on a diverse subset of the reviews picked by select_prompt_reviews.
+    The call is bounded by GEMINI_TIMEOUT_S; after a timeout or API error Gemini
+    is skipped for GEMINI_COOLDOWN_S so a hung or quota-limited API doesn't
+    stall requests. Content / parse errors only affect the current request.
+    """
+    global _gemini_retry_at
+
     gemini_output = {
         "pros": [],
         "cons": [],
         "verdict": "Analysis unavailable",
     }
 
-    if genai and GEMINI_API_KEY:
-        try:
-            genai.configure(api_key=GEMINI_API_KEY)
-            
-            # Use a fast, cost-effective Gemini model
-            model = genai.GenerativeModel("models/gemini-2.5-flash")
-            
-            # Prepare a simplified version of reviews for the prompt to save tokens
-            reviews_for_prompt = reviews_data[:15]
-
-            prompt = f"""
-            Act as an E-Commerce Fraud Detection Expert. Analyze these reviews:
-            {json.dumps(reviews_for_prompt, indent=2)}
-
-            Your Tasks:
-            1. Summarize the main pros buyers mention.
-            2. Summarize the main cons / complaints buyers mention.
-            3. Give a one-sentence buying advice verdict.
-
-            Do NOT estimate bot probability. Focus only on pros, cons, and verdict.
-
-            Output strictly VALID JSON with this structure and nothing else:
-            {{
-                "pros": ["short point 1", "short point 2"],
-                "cons": ["short point 1", "short point 2"],
-                "verdict": "<one sentence buying advice>"
-            }}
-            """
-            
-            response = model.generate_content(prompt)
-            
-            if response.text:
-                cleaned_json = clean_json_string(response.text)
-                parsed_result = json.loads(cleaned_json)
-                
+    if not gemini_enabled():
+        return gemini_output
+
+    try:
+        # Selection (VADER + MinHash) and dumping run off the event loop, and only
+        # when Gemini will actually be called.
+        reviews_for_prompt = await asyncio.to_thread(_prompt_reviews, texts, reviews)
+        if not reviews_for_prompt:
+            # Every review was blank: nothing for Gemini to summarize
+            return gemini_output
+
+        cache_key = hashlib.sha256(
+            orjson.dumps(reviews_for_prompt, option=orjson.OPT_SORT_KEYS)
+        ).hexdigest()
+        with _gemini_cache_lock:
+            cached = _gemini_cache.get(cache_key)
+
+        if cached is not None:
+            gemini_output = dict(cached)
+        elif time.monotonic() < _gemini_retry_at:
+            gemini_output["verdict"] = "AI Analysis failed (Statistical mode only)."
+        else:
+            prompt = (
+                "Act as an E-Commerce Fraud Detection Expert. Analyze these reviews:\n"
+                f"{orjson.dumps(reviews_for_prompt).decode()}\n"
+                "Return short pros buyers mention, short cons / complaints, and a "
+                "one-sentence buying advice verdict. Do NOT estimate bot probability."
+            )
+
+            parsed_result = await asyncio.wait_for(_call_gemini(prompt), timeout=GEMINI_TIMEOUT_S)
+
+            if parsed_result:
                 # Update gemini_output with valid keys from response
                 gemini_output["pros"] = parsed_result.get("pros", [])
                 gemini_output["cons"] = parsed_result.get("cons", [])
                 gemini_output["verdict"] = parsed_result.get("verdict", "No verdict provided.")
 
-        except Exception as e:
-            print(f"Gemini Analysis Error: {e}")
-            gemini_output["verdict"] = "AI Analysis failed (Statistical mode only)."
+                with _gemini_cache_lock:
+                    _gemini_cache[cache_key] = dict(gemini_output)
+
+    except _GEMINI_OUTAGE_ERRORS as e:
+        print(f"Gemini Unavailable, pausing for {GEMINI_COOLDOWN_S:.0f}s: {e!r}")
+        _gemini_retry_at = time.monotonic() + GEMINI_COOLDOWN_S
+        gemini_output["verdict"] = "AI Analysis failed (Statistical mode only)."
+    except Exception as e:
+        # Blocked / malformed response for this prompt only; don't pause Gemini for everyone
+        print(f"Gemini Analysis Error: {e!r}")
+        gemini_output["verdict"] = "AI Analysis failed (Statistical mode only)."
+
+    return gemini_output
+
+
+async def analyze_reviews(
+    texts: List[str],
+    ratings: List[float],
+    reviews: Sequence[Any],
+) -> Dict[str, Any]:
+    """
+    Analyzes parallel lists of review texts and star ratings. reviews holds the
+    matching structured review objects (dicts or Pydantic models); only a small
+    subset is dumped, for the Gemini prompt:
+    [{ 'text': '...', 'rating': 5, 'date': '...', 'verified': True }, ...]
+
+    DistilBERT sentiment (CPU-bound) and Gemini (network-bound) are independent,
+    so sentiment runs in a worker thread while the Gemini call is awaited.
+    """
+    
+    # 1. Safety check for empty reviews
+    if not texts:
+        return {
+            "trust_score": 0, 
+            "sentiment_score": 0.0,
+            "bot_probability": 0,
+            "safety_label": "Unknown",
+            "pros": [], 
+            "cons": [], 
+            "verdict": "No reviews found to analyze."
+        }
 
-    # 5. TRUST SCORE CALCULATION (TRADITIONAL ONLY)
+    ratings_np = np.fromiter(ratings, dtype=np.float64, count=len(ratings))
+    lens_np = np.fromiter((len(t) for t in texts), dtype=np.int32, count=len(texts))
+
+    # 2. SENTIMENT ANALYSIS + GEMINI ANALYSIS (for pros/cons + verdict only), concurrently.
+    # Near-duplicate hashing is CPU work too, so it also runs off the event loop.
+    polarities, duplicates_count, gemini_output = await asyncio.gather(
+        asyncio.to_thread(_run_sentiment, texts),
+        asyncio.to_thread(_near_duplicate_count, texts),
+        _run_gemini(texts, reviews),
+    )
+
+    avg_sentiment = float(np.mean(polarities)) if polarities else 0.0
+    avg_rating = float(ratings_np.mean())
+
+    # 3. SENTIMENT REALITY CHECK
+    # Check if high stars (5.0) match high sentiment (>0.5).
+    # Normalized rating: 0-5 stars -> -1.0 to 1.0 range
+    normalized_rating = (avg_rating - 2.5) / 2.5 
+    discrepancy = abs(normalized_rating - avg_sentiment)
+
+    # 4. TRUST SCORE CALCULATION (TRADITIONAL ONLY)
     #
     # Goals:
     # - DistilBERT sentiment + star ratings + review volume form the base trust.
@@ -394,17 +778,11 @@ def analyze_reviews(reviews_data: List[Dict[str, Any]]) -> Dict[str, Any]:
     )
 
     # B. Heuristic bot probability (no GenAI)
-    unique_texts = set(texts)
-    duplicates_count = max(0, len(texts) - len(unique_texts))
     duplicate_fraction = (duplicates_count / review_count) if review_count > 0 else 0.0
 
-    short_texts = [t for t in texts if len(t) < 30]
-    short_fraction = (len(short_texts) / review_count) if review_count > 0 else 0.0
+    short_fraction = float((lens_np < 30).mean())
 
-    try:
-        rating_std = statistics.pstdev(ratings) if len(ratings) > 1 else 0.0
-    except statistics.StatisticsError:
-        rating_std = 0.0
+    rating_std = float(ratings_np.std()) if review_count > 1 else 0.0
 
     bot_prob = 0.0
     # Many duplicates → likely templated / copy-paste reviews
@@ -429,7 +807,7 @@ def analyze_reviews(reviews_data: List[Dict[str, Any]]) -> Dict[str, Any]:
         score -= min(duplicates_count * 4, 16)
 
     # E. Short review penalty (low-effort reviews)
-    avg_len = statistics.mean([len(t) for t in texts]) if texts else 0
+    avg_len = float(lens_np.mean())
     if avg_len < 15:
         score -= 8
 
@@ -7,7 +7,12 @@ from typing import List, Optional
 from fastapi.middleware.cors import CORSMiddleware
 
 # Import logic functions
-from logic import analyze_reviews, analyze_site_risk, check_phishing
+from logic import (
+    analyze_reviews,
+    analyze_site_risk,
+    check_phishing,
+    is_confirmed_typosquat,
+)
 
 app = FastAPI()
 
@@ -19,6 +24,9 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Highest trust score for pages whose domain only loosely resembles a known brand
+PHISHING_TRUST_CAP = 60
+
 # --- ROBUST DATA MODELS ---
 class ReviewItem(BaseModel):
     text: str
@@ -62,19 +70,26 @@ async def analyze_product(payload: ScrapeRequest):
 
     try:
         domain_status = check_phishing(payload.url)
-        page_text = payload.page_text or ""
 
-        # Convert Pydantic models to dicts
-        review_dicts = []
-        for r in payload.reviews:
-            if hasattr(r, "model_dump"):
-                review_dicts.append(r.model_dump())
-            else:
-                review_dicts.append(r.dict())
+        # Confirmed typosquat: skip sentiment / Gemini entirely and answer immediately.
+        # Looser "Phishing Warning" matches (amazon.de, etsy.com, ...) take the normal path.
+        if domain_status == "Phishing Warning" and is_confirmed_typosquat(payload.url):
+            return AnalysisResponse(
+                trust_score=0,
+                sentiment_score=0.0,
+                bot_probability=0,
+                safety_label="High Risk / Caution",
+                pros=[],
+                cons=["URL closely mimics a known brand domain"],
+                verdict="Likely typosquat — do not proceed.",
+                phishing_status=domain_status,
+            )
+
+        page_text = payload.page_text or ""
 
         # If no reviews were scraped (unsupported site, or rating summary only),
         # fall back to a domain + page-text safety assessment so TruthLens still "works".
-        if not review_dicts:
+        if not payload.reviews:
             site_result = analyze_site_risk(domain_status, page_text, payload.title)
 
             return AnalysisResponse(
@@ -89,12 +104,15 @@ async def analyze_product(payload: ScrapeRequest):
             )
 
         # Normal path: we have structured reviews (Amazon / Flipkart / others we support)
-        analysis_result = analyze_reviews(review_dicts)
+        # Scoring only needs text + rating; only the Gemini prompt subset is dumped to dicts
+        texts = [r.text for r in payload.reviews]
+        ratings = [r.rating for r in payload.reviews]
+        analysis_result = await analyze_reviews(texts, ratings, payload.reviews)
 
         base_trust = int(analysis_result.get("trust_score", 0))
         sentiment_score = float(analysis_result.get("sentiment_score", 0.0))
         bot_prob = int(analysis_result.get("bot_probability", 0))
-        review_count = len(review_dicts)
+        review_count = len(texts)
 
         # Final calibration step: on clearly official, safe domains with good sentiment,
         # avoid overly harsh scores. This matches the "very_safe" UX you want.
@@ -105,11 +123,18 @@ async def analyze_product(payload: ScrapeRequest):
             elif review_count >= 20 and sentiment_score > 0.3 and bot_prob <= 70:
                 calibrated_trust = max(calibrated_trust, 70)
 
+        # Domain resembles a known brand but isn't a confirmed typosquat: keep the
+        # review-based analysis, but never present it as "Likely Authentic".
+        safety_label = analysis_result.get("safety_label", "Unknown")
+        if domain_status == "Phishing Warning" and calibrated_trust > PHISHING_TRUST_CAP:
+            calibrated_trust = PHISHING_TRUST_CAP
+            safety_label = "Moderate Risk"
+
         return AnalysisResponse(
             trust_score=calibrated_trust,
             sentiment_score=round(sentiment_score, 2),
             bot_probability=bot_prob,
-            safety_label=analysis_result.get("safety_label", "Unknown"),
+            safety_label=safety_label,
             pros=analysis_result.get("pros", []),
             cons=analysis_result.get("cons", []),
             verdict=analysis_result.get("verdict", "No verdict available"),